@@ -5,8 +5,8 @@
 # For version history and recent changes, see the CHANGELOG.md file.
 #
 # Known issues:
-#  - If the input .mkv file contains subtitles, they will be copied to the new file,
-#    but any language tags will be lost.
+#  - If the input .mkv file contains subtitles, they will be copied to the new file with their language tags,
+#    but global file metadata (title,...) is dropped when audio is converted.
 #
 #  - If the input file contains multiple audio or video streams that need to be converted,
 #    only the first matching stream will be converted.
@@ -16,16 +16,42 @@
 #     - If only the audio stream needs to be converted, the same setting allows copying all video streams.
 #  - EAC3 on ffmpeg doesnt support more than 5.1 channels
 
-VERSION = "1.76"
+VERSION = "1.82"
 import os
 import sys
 import argparse
+import atexit
+import json
+import shlex
+import shutil
+import sqlite3
 import subprocess
+import tempfile
 from pathlib import Path
 import multiprocessing
-import re
 import time
+import threading
+from codecs import lookup as lookup_codec
+from dataclasses import dataclass
 from datetime import timedelta
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Union
+
+try:
+    from charset_normalizer import from_bytes  # optional, without it the 'file' command is used
+except ImportError:
+    from_bytes = None
+
+try:
+    from pymediainfo import MediaInfo  # optional, parses MP4/MOV headers in-process with libmediainfo
+except ImportError:
+    MediaInfo = None
+
+try:
+    import av  # optional PyAV, reads file headers in-process instead of starting ffprobe for every file
+except ImportError:
+    av = None
 
 NUMBER_OF_THREADS = multiprocessing.cpu_count()
 if NUMBER_OF_THREADS > 16:
@@ -37,6 +63,20 @@ if NUMBER_OF_THREADS > 16:
 
 # Desired video encoding codec:
 OUTPUT_VIDEO_CODEC = "libx265" # If you change this, be careful and update the function: build_video_args and parameters there...
+                               # Can be overridden with --encoder NAME, --encoder auto picks a hardware encoder if one works.
+
+# Hardware HEVC encoders tried by --encoder auto, in order of preference. ffmpeg lists all encoders it was built with,
+# even if there is no matching GPU, so each one is test-run on a tiny generated clip before it is used.
+HW_VIDEO_ENCODERS = ["hevc_nvenc", "hevc_qsv", "hevc_vaapi", "hevc_videotoolbox"]
+VAAPI_DEVICE = "/dev/dri/renderD128"  # used by hevc_vaapi
+
+# Decode on the same GPU when a hardware encoder is used, so frames don't travel GPU -> RAM -> GPU. Can be enabled
+# with --hwaccel. Codecs the GPU can't decode fall back to CPU decoding automatically.
+HW_DECODE_ENABLED = False
+
+# Short names accepted by --encoder for software encoders
+ENCODER_ALIASES = {"x265": "libx265", "x264": "libx264", "svtav1": "libsvtav1"}
+SVTAV1_PRESET = "12"  # libsvtav1 preset 0 (slowest, smallest files) - 13 (fastest), 12 encodes faster than x265 -preset fast
 
 # Desired audio encoding codec:
 OUTPUT_AUDIO_CODEC = "aac" # Tested with aac, ac3 and eac3, but can be changed to any codec supported by ffmpeg.
@@ -63,6 +103,17 @@ BITRATE_AUDIO_MAP = {
 MULTITHREADING_ENABLED = True
 # ====================
 
+# Number of files converted at the same time when input is a directory, can be overridden with --jobs N.
+# ffmpeg threads are split between jobs, so each job gets NUMBER_OF_THREADS / PARALLEL_JOBS threads.
+# Useful when files are small or when the encoder can't keep all cores busy on its own.
+PARALLEL_JOBS = 1
+
+# Number of files scanned with ffprobe at the same time when input is a directory. Scanning mostly waits for
+# ffprobe to start and read file headers, so it is done ahead of conversion, in parallel with it.
+# --subs-only checks and converts this many subtitles at the same time as well.
+SCAN_THREADS = 8
+# ====================
+
 #video CRF setting, lower is better quality, but bigger file size
 #Usually between 18 and 28 vor x265, 18 is visually lossless, 28 is low quality
 DEFAULT_CRF = "20"  # Default CRF value for x265, can be adjusted. Lower = higher quality (usual range: 18–28)
@@ -89,13 +140,43 @@ COPY_ALL_AUDIO_OR_VIDEO_STREAMS_OF_ALLOWED_CODECS = False  # False or True
 # Paramether --output-mp4 will reset this setting to false (even if set to True in here)
 # ====================
 
-SUPPORTED_EXTENSIONS = [".avi", ".mkv", ".mp4", ".mpg", ".mpeg", ".mov", ".wmv"]
+# With --output-mp4, files with codecs that MP4 can hold as they are (e.g. MKV with HEVC + AAC) are remuxed:
+# streams are copied into a new MP4 container without re-encoding, instead of being skipped as already in correct format.
+MP4_COMPATIBLE_VIDEO_CODECS = ["HEVC", "H264"]
+MP4_COMPATIBLE_AUDIO_CODECS = ["AAC", "AC3", "EAC3", "MP3"]
+# ====================
+
+# With --extra-output every converted file also gets a small preview MP4 (conv-<name>.preview.mp4).
+# It is written by the same ffmpeg run as the main output, so the source is read and decoded only once.
+EXTRA_OUTPUT_ENABLED = False
+EXTRA_OUTPUT_SUFFIX = ".preview.mp4"
+EXTRA_OUTPUT_ARGS = ["-map", "0:v:0", "-map", "0:a:0?", "-vf", "scale=-2:min(720\\,ih)",
+                     "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+                     "-c:a", "aac", "-b:a", "160k", "-ac", "2"]
+# ====================
+
+# Remember ffprobe results in a SQLite database in the user's cache directory, so unchanged files (same path, size
+# and modification time) are not probed again on the next run. Can be disabled with --no-cache.
+PROBE_CACHE_ENABLED = True
+PROBE_CACHE_PATH = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "ffmpeg_convert.db"
+# ====================
+
+SUPPORTED_EXTENSIONS = frozenset({".avi", ".mkv", ".mp4", ".mpg", ".mpeg", ".mov", ".wmv"})  # lowercase, set for fast lookup
 # ====================
 
 # ======================================================================================================================
 #                  END OF CONFIGURATION SECTION
 # ======================================================================================================================
 
+# Lookup structures derived from the configuration, built once instead of per file
+_FORCE_V = tuple(c.upper() for c in FORCE_CONVERSION_VIDEO_CODECS)
+_FORCE_V_EXACT = frozenset(c for c in _FORCE_V if "-" in c)    # codec with tag, e.g. MPEG4-XVID must match exactly
+_FORCE_V_PREFIX = tuple(c for c in _FORCE_V if "-" not in c)   # codec only, e.g. MPEG4 matches MPEG4-XVID, MPEG4-DIVX,...
+_FORCE_A = frozenset(c.upper() for c in FORCE_CONVERSION_AUDIO_CODECS)
+_MP4_V = frozenset(c.upper() for c in MP4_COMPATIBLE_VIDEO_CODECS)
+_MP4_A = frozenset(c.upper() for c in MP4_COMPATIBLE_AUDIO_CODECS)
+_MEDIA_SUFFIXES = tuple(SUPPORTED_EXTENSIONS)  # str.endswith takes a tuple
+
 # ====================
 # Help
 # ====================
@@ -104,7 +185,7 @@ def help():
 FFmpeg Video Converter Script, v{4} (Tomaž 2025)
 
 Usage:
-  python3 script.py [-i] [--log output.log] [--dry-run] [--output-mp4] [-s] [--crf N] [--max-video-bitrate N] [--force] [--help] <input_path>
+  python3 script.py [-i] [--log output.log] [--dry-run] [--output-mp4] [-s] [--crf N] [--max-video-bitrate N] [--force] [--jobs N] [--encoder NAME] [--hwaccel] [--extra-output] [--no-cache] [--help] <input_path>
 
 Options:
   -i                     Only display video/audio codec info, no conversion.
@@ -116,6 +197,13 @@ Options:
   --crf N                Set CRF value for video encoding (default: 20)
   --force                Force re-encoding of the first video and audio streams using OUTPUT_VIDEO_CODEC and
                          OUTPUT_AUDIO_CODEC, ignoring FORCE_CONVERSION_* rules. Skips if a conv-* file exists.
+  --jobs N               Convert N files at the same time, ffmpeg threads are split between jobs (default: 1).
+  --extra-output         Also write a 720p preview conv-<name>{6} in the same ffmpeg run.
+  --encoder NAME         Video encoder to use instead of OUTPUT_VIDEO_CODEC, e.g. hevc_nvenc or x265, x264, svtav1
+                         (libsvtav1 with preset {7}). 'auto' uses the first working hardware encoder from
+                         HW_VIDEO_ENCODERS and falls back to OUTPUT_VIDEO_CODEC.
+  --hwaccel              With a hardware encoder (NVENC, QSV, VAAPI, VideoToolbox) decode on the GPU as well.
+  --no-cache             Don't read or write the probe cache {5}.
   --help, -h             Show this help message and exit. For version history, see CHANGELOG.md.
 
 Behavior:
@@ -130,7 +218,7 @@ Configuration:
   - FORCE_CONVERSION_AUDIO_CODECS: {1}
   - OUTPUT_VIDEO_CODEC: {2}
   - OUTPUT_AUDIO_CODEC: {3}
-""".format(FORCE_CONVERSION_VIDEO_CODECS, FORCE_CONVERSION_AUDIO_CODECS, OUTPUT_VIDEO_CODEC, OUTPUT_AUDIO_CODEC, VERSION)
+""".format(FORCE_CONVERSION_VIDEO_CODECS, FORCE_CONVERSION_AUDIO_CODECS, OUTPUT_VIDEO_CODEC, OUTPUT_AUDIO_CODEC, VERSION, PROBE_CACHE_PATH, EXTRA_OUTPUT_SUFFIX, SVTAV1_PRESET)
     print(message)
 
 # ====================
@@ -141,12 +229,27 @@ if len(sys.argv) == 1:
     sys.exit(0)
 
 # ====================
+LOG_LOCK = threading.Lock()  # parallel jobs share the console and the log file
+LOG_FILES = {}  # log file name -> file handle, opened once instead of for every message
+LOG_BUFFER_SIZE = 64 * 1024  # messages are written in 64 KiB blocks, the files are flushed and closed at exit
+
+def close_log_files():
+    with LOG_LOCK:
+        for log_fh in LOG_FILES.values():
+            log_fh.close()
+        LOG_FILES.clear()
+
 def print_or_log(message, log_file=None):
-    if log_file:
-        with open(log_file, "a") as f:
-            f.write(message + "\n")
-    else:
-        print(message)
+    with LOG_LOCK:
+        if log_file:
+            log_fh = LOG_FILES.get(log_file)
+            if log_fh is None:
+                log_fh = LOG_FILES[log_file] = open(log_file, "a", buffering=LOG_BUFFER_SIZE, encoding="utf-8")
+                if len(LOG_FILES) == 1:
+                    atexit.register(close_log_files)
+            log_fh.write(message + "\n")
+        else:
+            print(message)
 
 # ====================
 # Argument Parsing
@@ -163,6 +266,11 @@ def parse_args():
     parser.add_argument("--max-video-bitrate", dest="max_video_bitrate", type=int, help="Force video conversion if bitrate exceeds this value in kbps (0 = disabled, default)")
     parser.add_argument("--crf", dest="crf", type=int, help="Set CRF value for video encoding (default: 20)")
     parser.add_argument("--force", action="store_true", help="Force converting even if file(s) otherwise wouldn't be converted. Force converting video and audio streams.")
+    parser.add_argument("--jobs", dest="jobs", type=int, help="Number of files converted at the same time (default: 1)")
+    parser.add_argument("--encoder", dest="encoder", help="Video encoder to use, 'auto' to detect a hardware encoder")
+    parser.add_argument("--hwaccel", action="store_true", dest="hwaccel", help="Decode on the GPU when a hardware encoder is used")
+    parser.add_argument("--extra-output", action="store_true", dest="extra_output", help="Also write a preview MP4 in the same ffmpeg run")
+    parser.add_argument("--no-cache", action="store_true", dest="no_cache", help="Don't use the on-disk probe cache")
     args = parser.parse_args()
 
     if args.show_help:
@@ -180,10 +288,77 @@ def parse_args():
 # ====================
 # Subtitle Encoding Conversion
 # ====================
+ENCODING_SAMPLE_BYTES = 64 * 1024
+_C1_BYTES = frozenset(range(0x80, 0xA0))  # control codes in ISO-8859-*, letters (š, ž, ...) in cp1250
+
+def _trim_partial_utf8(sample):
+    # A sample cut from a longer file may end in the middle of a UTF-8 character (up to 3 of its 4 bytes),
+    # those bytes alone are not valid UTF-8 and would make the whole sample look like an 8-bit code page
+    for i in range(1, min(4, len(sample)) + 1):
+        byte = sample[-i]
+        if byte < 0x80:  # ASCII, nothing cut
+            return sample
+        if byte >= 0xC0:  # first byte of a character, is the character complete?
+            length = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return sample[:-i] if i < length else sample
+    return sample  # only continuation bytes, not UTF-8 anyway
+
+def detect_encoding(path):
+    """Returns text encoding of a file, named like 'file -b --mime-encoding' does (us-ascii, utf-8, unknown-8bit, ...)."""
+    if from_bytes is None:
+        result = subprocess.run(["file", "-b", "--mime-encoding", str(path)], capture_output=True, text=True)
+        return result.stdout.strip()
+
+    # Subtitles are small, but the first 64 KiB are plenty to tell the encoding even for big ones
+    with open(path, "rb") as f:
+        sample = f.read(ENCODING_SAMPLE_BYTES)
+        if len(sample) == ENCODING_SAMPLE_BYTES and f.read(1):
+            sample = _trim_partial_utf8(sample)
+    try:
+        sample.decode("utf-8")  # valid UTF-8 is never an 8-bit code page, no need to guess
+        return "us-ascii" if sample.isascii() else "utf-8"
+    except UnicodeDecodeError:
+        pass
+    best = from_bytes(sample).best()
+    if best is None:
+        return "binary"
+    # Canonical Python codec name, aliases like 'windows-1250' / 'utf_8' all compare as 'cp1250' / 'utf-8'
+    encoding = lookup_codec(best.encoding).name
+    if encoding == "ascii":
+        return "us-ascii"
+    if encoding.startswith("utf-"):
+        return encoding.replace("-sig", "")  # 'file' reports UTF-8 with BOM as utf-8 too
+    if encoding == "cp1250":
+        return "windows-1250"
+    # Guesses on short subtitles often name a related code page (cp1125, cp1257, ...), so the decision is made like
+    # 'file' does: 8-bit text using bytes 0x80-0x9F is unknown-8bit and gets converted as cp1250. Other text keeps
+    # the guessed name and is left alone, a Latin-1 'à' must not become 'ŕ'.
+    if not _C1_BYTES.isdisjoint(sample):
+        return "unknown-8bit"
+    if encoding.startswith("iso8859-"):
+        return encoding.replace("iso8859-", "iso-8859-")  # 'file' style, e.g. iso-8859-1
+    return encoding
+
+SUBTITLE_COPY_BUFFER = 32 * 1024
+
+def _cp1250_to_utf8(src_path, dst_path):
+    # cp1250 is a single-byte encoding, so every block decodes on its own and big files never sit in memory whole.
+    # The few bytes undefined in cp1250 become U+FFFD instead of failing the whole subtitle.
+    # Written to <name>.part and renamed when complete, an interrupted run must not leave a cut off subtitle that
+    # the next run would see as already converted.
+    part_path = dst_path.with_name(dst_path.name + ".part")
+    try:
+        with open(src_path, "rb") as src, open(part_path, "wb") as dst:
+            while block := src.read(SUBTITLE_COPY_BUFFER):
+                dst.write(block.decode("cp1250", errors="replace").encode("utf-8"))
+        os.replace(part_path, dst_path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+
 def convert_srt_to_utf8(original_path, log_file=None, dry_run=False):
     try:
-        result = subprocess.run(["file", "-b", "--mime-encoding", str(original_path)], capture_output=True, text=True)
-        encoding = result.stdout.strip()
+        encoding = detect_encoding(original_path)
 
         if encoding in ["unknown-8bit", "windows-1250"]:
             utf8_path = original_path.with_name(original_path.stem + ".utf8.srt")
@@ -194,7 +369,7 @@ def convert_srt_to_utf8(original_path, log_file=None, dry_run=False):
             if dry_run:
                 print_or_log(f"     DRY RUN: Would convert {original_path} from {encoding} to UTF-8", log_file)
             else:
-                subprocess.run(["iconv", "-f", "windows-1250", "-t", "UTF-8", "-o", str(utf8_path), str(original_path)], check=True)
+                _cp1250_to_utf8(original_path, utf8_path)
                 print_or_log(f"     Subtitle converted from {encoding} to UTF-8: {utf8_path}", log_file)
             return utf8_path
 
@@ -203,45 +378,185 @@ def convert_srt_to_utf8(original_path, log_file=None, dry_run=False):
     return None
 
 # ====================
-def scan_file(file_path, log_file=None):
-    """Returns a dict with detected video, audio codec names and audio metadata."""
+@dataclass(frozen=True)
+class Codecs:
+    """Scanned stream info of one file, everything the ffmpeg argument builders need."""
+    video_codec: str
+    audio_codec: str
+    channels: Union[int, str, None] = None  # int from ffprobe/PyAV, "5.1"-style string from the older parsers
+    sample_rate: Optional[str] = None
+    bitrate_kbps: float = 0
+
+    @classmethod
+    def from_scan(cls, scan):
+        audio_metadata = scan.get("audio_metadata", {})
+        return cls(scan.get("video_codec"), scan.get("audio_codec"), audio_metadata.get("channels"),
+                   audio_metadata.get("sample_rate"), scan.get("bitrate_kbps", 0))
+
+def scan_file(file_path, log_file=None, stat_result=None):
+    """Returns a dict with detected video, audio codec names and audio metadata.
+
+    Results are cached per (path, mtime in ns, size), so scanning the same unchanged file again doesn't run ffprobe.
+    Returned dict is shared between callers and must not be modified.
+    stat_result can be passed if caller already has it (e.g. from iter_media_files), to avoid another stat() call.
+    """
+    if stat_result is None:
+        try:
+            stat_result = file_path.stat()
+        except OSError:
+            return probe_file(file_path, log_file)
+    return _probe_file_cached(str(file_path), stat_result.st_mtime_ns, stat_result.st_size, log_file)
+
+@lru_cache(maxsize=4096)
+def _probe_file_cached(path_str, mtime_ns, size, log_file=None):
+    # mtime_ns is only part of the cache key, a changed file gets probed again.
+    # Integer nanoseconds compare exactly, float st_mtime can lose precision on filesystems with ns timestamps.
+    file_path = Path(path_str)
+    if PROBE_CACHE_ENABLED:
+        codecs = get_cached_probe(file_path, mtime_ns, size)
+        if codecs is not None:
+            return codecs
+
+    codecs = probe_file(file_path, log_file, size)
+    if PROBE_CACHE_ENABLED and codecs.get("video_codec"):  # don't remember failed probes
+        store_probe(file_path, mtime_ns, size, codecs)
+    return codecs
+
+# ====================
+# On-disk probe cache, SQLite database PROBE_CACHE_PATH shared by all directories, one row per probed file
+# ====================
+PROBE_CACHE_LOCK = threading.Lock()  # one connection is shared by scan threads, sqlite3 objects aren't thread safe
+PROBE_CACHE_COMMIT_EVERY = 100  # inserts are committed in batches, the rest at exit
+_probe_db = None
+_probe_db_failed = False
+_probe_db_pending = 0
+
+def _open_probe_cache():
+    # must be called with PROBE_CACHE_LOCK held, returns None if the database can't be used
+    global _probe_db, _probe_db_failed
+    if _probe_db is None and not _probe_db_failed:
+        try:
+            PROBE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            _probe_db = sqlite3.connect(str(PROBE_CACHE_PATH), check_same_thread=False)
+            # WAL with synchronous=NORMAL doesn't fsync on every commit and still can't corrupt the database on a
+            # crash, at worst the last rows are lost and those files are probed again
+            _probe_db.execute("PRAGMA journal_mode = WAL")
+            _probe_db.execute("PRAGMA synchronous = NORMAL")
+            _probe_db.execute("CREATE TABLE IF NOT EXISTS probe (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, codecs TEXT)")
+        except (OSError, sqlite3.Error):
+            _probe_db = None
+            _probe_db_failed = True  # e.g. read-only home, files will just be probed every time
+    return _probe_db
+
+def get_cached_probe(file_path, mtime_ns, size):
+    """Returns cached scan result for file_path if size and mtime_ns still match, otherwise None."""
+    with PROBE_CACHE_LOCK:
+        db = _open_probe_cache()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT codecs FROM probe WHERE path = ? AND mtime_ns = ? AND size = ?",
+                             (os.path.abspath(file_path), mtime_ns, size)).fetchone()
+        except sqlite3.Error:
+            return None
+    if row is None:
+        return None
+    try:
+        return json.loads(row[0])
+    except ValueError:
+        return None
+
+def store_probe(file_path, mtime_ns, size, codecs):
+    global _probe_db_pending
+    with PROBE_CACHE_LOCK:
+        db = _open_probe_cache()
+        if db is None:
+            return
+        try:
+            db.execute("INSERT OR REPLACE INTO probe (path, mtime_ns, size, codecs) VALUES (?, ?, ?, ?)",
+                       (os.path.abspath(file_path), mtime_ns, size, json.dumps(codecs)))
+            _probe_db_pending += 1
+            if _probe_db_pending >= PROBE_CACHE_COMMIT_EVERY:
+                db.commit()
+                _probe_db_pending = 0
+        except sqlite3.Error:
+            pass
+
+def close_probe_cache():
+    """Commits the remaining probe results and closes the database, called once at exit."""
+    global _probe_db
+    with PROBE_CACHE_LOCK:
+        if _probe_db is None:
+            return
+        try:
+            _probe_db.commit()
+            _probe_db.close()
+        except sqlite3.Error:
+            pass
+        _probe_db = None
+
+# Read at most 32 KB and don't decode frames to measure fps, enough when codec info is in the container headers.
+# analyzeduration 0 would mean "default" (5 s) to libavformat, so the smallest useful duration is given instead.
+FAST_PROBE_ARGS = ["-probesize", "32K", "-analyzeduration", "100K", "-fpsprobesize", "0"]
+
+def _run_ffprobe(file_path, probe_args):
+    # One ffprobe call returns the needed stream and container fields, parsed once
+    probe_cmd = [
+        "ffprobe", "-v", "error", *probe_args,
+        "-print_format", "json",
+        # Only the fields parsed in probe_file, ffprobe doesn't have to format (and we don't have to parse) everything else
+        "-show_entries", "stream=codec_type,codec_name,codec_tag_string,channels,sample_rate,bit_rate:stream_tags=BPS:format=duration",
+        str(file_path)
+    ]
+    probe_output = subprocess.check_output(probe_cmd, stderr=subprocess.DEVNULL, encoding="utf-8", errors="replace")
+    return json.loads(probe_output)
+
+def probe_file(file_path, log_file=None, size_bytes=None):
+    """Runs ffprobe (or PyAV if installed) on file_path, use scan_file() instead to get cached results."""
+    if MediaInfo is not None and file_path.suffix.lower() in MEDIAINFO_EXTENSIONS:
+        try:
+            result = probe_file_mediainfo(file_path, size_bytes)
+            if result is not None:
+                return result
+        except Exception:
+            pass  # fall back to PyAV / ffprobe
+    if av is not None:
+        try:
+            return probe_file_pyav(file_path, size_bytes)
+        except Exception:
+            pass  # PyAV couldn't read it, let ffprobe try and report the error
+
     result = {"video_codec": None, "audio_codec": None, "audio_metadata": {}, "bitrate_kbps": 0}
 
     try:
+        # Codecs are known from container headers, so first try reading only those
+        parsed = _run_ffprobe(file_path, FAST_PROBE_ARGS)
+        streams = parsed.get("streams", [])
+        video_stream = next((s for s in streams if s.get("codec_type") == "video"), None)
+        audio_stream = next((s for s in streams if s.get("codec_type") == "audio"), None)
+        if not (video_stream and video_stream.get("codec_name") and audio_stream and audio_stream.get("channels")):
+            # Headers weren't enough (e.g. MPEG-TS, streams starting late), probe again with ffprobe defaults
+            parsed = _run_ffprobe(file_path, [])
+            streams = parsed.get("streams", [])
+            video_stream = next((s for s in streams if s.get("codec_type") == "video"), None)
+            audio_stream = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
         # Detect video codec
-        video_cmd = [
-            "ffprobe", "-v", "error",
-            "-select_streams", "v:0",
-            "-show_entries", "stream=codec_name,codec_tag_string",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            str(file_path)
-        ]
-        video_output_lines = subprocess.check_output(video_cmd, stderr=subprocess.DEVNULL).decode().strip().splitlines()
-        codec_name = video_output_lines[0].strip().upper() if len(video_output_lines) > 0 else None
-        codec_tag = video_output_lines[1].strip().upper() if len(video_output_lines) > 1 else None
-
-        if codec_tag and not codec_tag.startswith("["):
-            result["video_codec"] = f"{codec_name}-{codec_tag}"
-        else:
-            result["video_codec"] = codec_name
+        if video_stream:
+            codec_name = video_stream.get("codec_name", "").strip().upper() or None
+            codec_tag = video_stream.get("codec_tag_string", "").strip().upper() or None
+
+            if codec_tag and not codec_tag.startswith("["):
+                result["video_codec"] = f"{codec_name}-{codec_tag}"
+            else:
+                result["video_codec"] = codec_name
 
         # Detect audio codec + metadata
-        audio_cmd = [
-            "ffprobe", "-v", "error",
-            "-select_streams", "a:0",
-            "-show_entries", "stream=codec_name,channels,sample_rate",
-            "-of", "json",
-            str(file_path)
-        ]
-        audio_info = subprocess.check_output(audio_cmd, stderr=subprocess.DEVNULL)
-        import json
-        parsed = json.loads(audio_info)
-        if parsed.get("streams"):
-            stream = parsed["streams"][0]
-            result["audio_codec"] = stream.get("codec_name", "").upper()
+        if audio_stream:
+            result["audio_codec"] = audio_stream.get("codec_name", "").upper()
             result["audio_metadata"] = {
-                "channels": stream.get("channels"),
-                "sample_rate": stream.get("sample_rate")
+                "channels": audio_stream.get("channels"),
+                "sample_rate": audio_stream.get("sample_rate")
             }
         #print(f" Detected metadata: audio channels={result['audio_metadata'].get('channels', '?')}, sample rate={result['audio_metadata'].get('sample_rate', '?')} Hz")
 
@@ -249,53 +564,27 @@ def scan_file(file_path, log_file=None):
         bitrate_found = False
 
         # 1. Try bit_rate from stream
-        try:
-            probe_cmd = [
-                "ffprobe", "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=bit_rate",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                str(file_path)
-            ]
-            bitrate_lines = subprocess.check_output(probe_cmd, stderr=subprocess.DEVNULL).decode().strip().splitlines()
-            if bitrate_lines and bitrate_lines[0].isdigit():
-                result["bitrate_kbps"] = int(bitrate_lines[0]) / 1_000
-                bitrate_found = True
-        except:
-            pass
-        
+        bit_rate = str(video_stream.get("bit_rate", "")) if video_stream else ""
+        if bit_rate.isdigit():
+            result["bitrate_kbps"] = int(bit_rate) / 1_000
+            bitrate_found = True
+
         # 2. Try stream_tags=BPS
         if not bitrate_found:
-            try:
-                bps_cmd = [
-                    "ffprobe", "-v", "error",
-                    "-select_streams", "v:0",
-                    "-show_entries", "stream_tags=BPS",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    str(file_path)
-                ]
-                bps_output = subprocess.check_output(bps_cmd, stderr=subprocess.DEVNULL).decode().strip()
-                if bps_output.isdigit():
-                    result["bitrate_kbps"] = int(bps_output) / 1_000
-                    bitrate_found = True
-            except:
-                pass
+            bps = str(video_stream.get("tags", {}).get("BPS", "")) if video_stream else ""
+            if bps.isdigit():
+                result["bitrate_kbps"] = int(bps) / 1_000
+                bitrate_found = True
 
         # 3. Fallback: calculate bitrate from size/duration
         if not bitrate_found:
             try:
                 # Get duration in seconds
-                duration_cmd = [
-                    "ffprobe", "-v", "error",
-                    "-show_entries", "format=duration",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    str(file_path)
-                ]
-                duration_str = subprocess.check_output(duration_cmd, stderr=subprocess.DEVNULL).decode().strip()
-                duration = float(duration_str)
+                duration = float(parsed.get("format", {}).get("duration"))
 
                 # Get file size in bytes
-                size_bytes = file_path.stat().st_size
+                if size_bytes is None:
+                    size_bytes = file_path.stat().st_size
 
                 # Calculate bitrate (bytes/sec -> bits/sec -> kbps)
                 bitrate_kbps = (size_bytes * 8) / duration / 1_000
@@ -310,7 +599,98 @@ def scan_file(file_path, log_file=None):
     return result
 
 
+# PyAV reports decoder names, which differ from ffprobe codec names for some codecs
+_PYAV_CODEC_NAMES = {"dca": "dts", "libdav1d": "av1", "libaom-av1": "av1"}
+
+def probe_file_pyav(file_path, size_bytes=None):
+    """Same result as probe_file, but read in-process with PyAV (libav) instead of running ffprobe."""
+    result = {"video_codec": None, "audio_codec": None, "audio_metadata": {}, "bitrate_kbps": 0}
+
+    with av.open(str(file_path), options={"probesize": "1000000", "analyzeduration": "1000000"}) as container:
+        video_stream = container.streams.video[0] if container.streams.video else None
+        audio_stream = container.streams.audio[0] if container.streams.audio else None
+
+        if video_stream:
+            ctx = video_stream.codec_context
+            codec_name = _PYAV_CODEC_NAMES.get(ctx.name, ctx.name or "").upper() or None
+            codec_tag = (getattr(ctx, "codec_tag", "") or "").upper()
+            # like ffprobe's "[0][0][0][0]", a tag with unprintable characters is not a real fourcc
+            if codec_tag and codec_tag.isprintable() and codec_tag.strip():
+                result["video_codec"] = f"{codec_name}-{codec_tag.strip()}"
+            else:
+                result["video_codec"] = codec_name
+
+        if audio_stream:
+            ctx = audio_stream.codec_context
+            layout = getattr(ctx, "layout", None)
+            channels = getattr(layout, "nb_channels", None) or getattr(ctx, "channels", None)
+            result["audio_codec"] = _PYAV_CODEC_NAMES.get(ctx.name, ctx.name or "").upper()
+            result["audio_metadata"] = {
+                "channels": channels,
+                "sample_rate": str(ctx.sample_rate) if ctx.sample_rate else None  # string, as from ffprobe
+            }
+
+        # Same order as probe_file: stream bit_rate, BPS tag, size/duration
+        if video_stream and video_stream.bit_rate:
+            result["bitrate_kbps"] = video_stream.bit_rate / 1_000
+        elif video_stream and str(video_stream.metadata.get("BPS", "")).isdigit():
+            result["bitrate_kbps"] = int(video_stream.metadata["BPS"]) / 1_000
+        elif container.duration:
+            if size_bytes is None:
+                size_bytes = file_path.stat().st_size
+            result["bitrate_kbps"] = (size_bytes * 8) / (container.duration / 1_000_000) / 1_000
+
+    return result
+
+# MP4/MOV keep all codec info in the moov header, which libmediainfo reads without starting any process
+MEDIAINFO_EXTENSIONS = frozenset({".mp4", ".mov", ".m4v"})
+# MediaInfo format names -> ffprobe codec names, files with other formats are left to PyAV / ffprobe
+_MEDIAINFO_VIDEO_CODECS = {"HEVC": "hevc", "AVC": "h264", "MPEG-4 Visual": "mpeg4", "AV1": "av1", "VP9": "vp9"}
+_MEDIAINFO_AUDIO_CODECS = {"AAC": "aac", "AC-3": "ac3", "E-AC-3": "eac3", "DTS": "dts", "MLP FBA": "truehd",
+                           "FLAC": "flac", "Opus": "opus", "ALAC": "alac"}
+
+def probe_file_mediainfo(file_path, size_bytes=None):
+    """Same result as probe_file for MP4/MOV files, read with pymediainfo. Returns None for unknown formats
+    or if a video or audio track is missing."""
+    result = {"video_codec": None, "audio_codec": None, "audio_metadata": {}, "bitrate_kbps": 0}
+    tracks = MediaInfo.parse(str(file_path)).tracks
+    general = next((t for t in tracks if t.track_type == "General"), None)
+    video_track = next((t for t in tracks if t.track_type == "Video"), None)
+    audio_track = next((t for t in tracks if t.track_type == "Audio"), None)
+    if video_track is None or audio_track is None:
+        return None  # MediaInfo couldn't parse the streams (only General track), let PyAV / ffprobe try
+
+    codec_name = _MEDIAINFO_VIDEO_CODECS.get(video_track.format)
+    if codec_name is None:
+        return None
+    # codec_id is the sample entry fourcc (avc1, hvc1, mp4v-20,...), ffprobe shows it as codec tag
+    codec_tag = (video_track.codec_id or "").split("-")[0]
+    result["video_codec"] = f"{codec_name}-{codec_tag}".upper() if len(codec_tag) == 4 else codec_name.upper()
+
+    codec_name = _MEDIAINFO_AUDIO_CODECS.get(audio_track.format)
+    if codec_name is None:
+        return None
+    result["audio_codec"] = codec_name.upper()
+    result["audio_metadata"] = {
+        "channels": audio_track.channel_s,
+        "sample_rate": str(audio_track.sampling_rate) if audio_track.sampling_rate else None
+    }
+
+    if video_track.bit_rate:
+        result["bitrate_kbps"] = int(video_track.bit_rate) / 1_000
+    elif general and general.duration:
+        if size_bytes is None:
+            size_bytes = file_path.stat().st_size
+        result["bitrate_kbps"] = (size_bytes * 8) / (float(general.duration) / 1_000) / 1_000
+
+    return result
+
 # ====================
+def is_forced_video_codec(video_codec):
+    """True if video_codec matches FORCE_CONVERSION_VIDEO_CODECS."""
+    video_codec = video_codec.upper()
+    return video_codec in _FORCE_V_EXACT or video_codec.startswith(_FORCE_V_PREFIX)
+
 def should_convert(video_codec, audio_codec, bitrate_kbps=0, max_video_bitrate=0, force_mode_enabled=False):
     """Determine whether the video or audio stream needs conversion."""
     convert_video = False
@@ -323,23 +703,11 @@ def should_convert(video_codec, audio_codec, bitrate_kbps=0, max_video_bitrate=0
             convert_video_force_bitrate_limit = True
         return True, True, convert_video_force_bitrate_limit
 
-    if FORCE_CONVERSION_VIDEO_CODECS:
-        #print(f"Forced video codecs: {FORCE_CONVERSION_VIDEO_CODECS}")
-
-        # FORCE_CONVERSION_VIDEO_CODECS is here already uppercase
-        for forced_codec in FORCE_CONVERSION_VIDEO_CODECS: 
-            if "-" in forced_codec:
-                if video_codec.upper() == forced_codec:
-                    convert_video = True
-                    break
-            else:
-                if video_codec.upper().startswith(forced_codec):
-                    convert_video = True
-                    break
+    if is_forced_video_codec(video_codec):
+        convert_video = True
 
-    if FORCE_CONVERSION_AUDIO_CODECS:
-        if audio_codec.upper() in FORCE_CONVERSION_AUDIO_CODECS:
-            convert_audio = True
+    if audio_codec.upper() in _FORCE_A:
+        convert_audio = True
 
     if max_video_bitrate > 0 and bitrate_kbps > max_video_bitrate:
         convert_video = True
@@ -347,6 +715,12 @@ def should_convert(video_codec, audio_codec, bitrate_kbps=0, max_video_bitrate=0
 
     return convert_video, convert_audio, convert_video_force_bitrate_limit
 
+# ====================
+def can_remux_to_mp4(video_codec, audio_codec):
+    """True if both streams can be copied into an MP4 container without conversion."""
+    video_codec_name = video_codec.upper().split("-")[0]  # without codec tag, e.g. H264-AVC1 -> H264
+    return video_codec_name in _MP4_V and audio_codec.upper() in _MP4_A
+
 # ====================
 def copy_subtitle_if_exists(input_path, output_path, log_file=None, dry_run=False):
     utf8_subtitle_path = input_path.with_name(input_path.stem + ".utf8.srt")
@@ -357,8 +731,7 @@ def copy_subtitle_if_exists(input_path, output_path, log_file=None, dry_run=Fals
     if utf8_subtitle_path.exists():
         if not dry_run:
             try:
-                with open(utf8_subtitle_path, 'rb') as src, open(output_srt, 'wb') as dst:
-                    dst.write(src.read())
+                shutil.copyfile(utf8_subtitle_path, output_srt)
                 print_or_log(f"     Subtitle copied: {output_srt.name}", log_file)
             except Exception as e:
                 print_or_log(f"     Error copying subtitle: {e}", log_file)
@@ -369,11 +742,10 @@ def copy_subtitle_if_exists(input_path, output_path, log_file=None, dry_run=Fals
     # If only .srt exists and encoding is invalid, convert it to UTF-8 and save as conv-*.srt
     if fallback_srt.exists():
         try:
-            result = subprocess.run(["file", "-b", "--mime-encoding", str(fallback_srt)], capture_output=True, text=True)
-            encoding = result.stdout.strip()
+            encoding = detect_encoding(fallback_srt)
             if encoding in ["unknown-8bit", "windows-1250"]:
                 if not dry_run:
-                    subprocess.run(["iconv", "-f", "windows-1250", "-t", "UTF-8", "-o", str(output_srt), str(fallback_srt)], check=True)
+                    _cp1250_to_utf8(fallback_srt, output_srt)
                     print_or_log(f" --> Subtitle converted and saved: {output_srt.name}", log_file)
                 else:
                     print_or_log(f"     DRY RUN: Would convert {fallback_srt} and save as {output_srt.name}", log_file)
@@ -384,8 +756,7 @@ def copy_subtitle_if_exists(input_path, output_path, log_file=None, dry_run=Fals
                 if not output_srt.exists():
                     if not dry_run:
                         try:
-                            with open(fallback_srt, 'rb') as src, open(output_srt, 'wb') as dst:
-                                dst.write(src.read())
+                            shutil.copyfile(fallback_srt, output_srt)
                             print_or_log(f"     Subtitle copied (UTF-8, no conversion needed): {output_srt.name}", log_file)
                         except Exception as e:
                           print_or_log(f"     Error copying UTF-8 subtitle: {e}", log_file)
@@ -396,16 +767,38 @@ def copy_subtitle_if_exists(input_path, output_path, log_file=None, dry_run=Fals
     return
 
 # ====================
-def build_video_args(input_path, convert_video, output_video_codec, crf, force_bitrate_limit, max_video_bitrate, output_ext):
-    args = []
-
-    if convert_video:
-        args += ["-map", "0:v:0"]  # always convert only the first video stream
-        args += ["-c:v", OUTPUT_VIDEO_CODEC]
+@lru_cache(maxsize=None)
+def _video_encoder_args(output_video_codec, crf, target_kbps):
+    # Same for every file of a run (except the bitrate limit), so built once and reused as a tuple.
+    # Depends on settings like NUMBER_OF_THREADS too, which don't change after startup.
+    args = ["-c:v", output_video_codec]
+    bufsize_kbps = target_kbps * 2 if target_kbps else None
+
+    if output_video_codec.endswith("_nvenc"):
+        # NVENC has no CRF, constant quality (-cq) in VBR mode is the closest match
+        args += ["-preset", "p4", "-tune", "hq", "-rc", "vbr", "-cq", crf, "-b:v", "0"]
+        if target_kbps:
+            args += ["-maxrate", f"{target_kbps}k", "-bufsize", f"{bufsize_kbps}k"]
+    elif output_video_codec.endswith("_qsv"):
+        args += ["-preset", "medium", "-global_quality", crf]
+        if target_kbps:
+            args += ["-maxrate", f"{target_kbps}k", "-bufsize", f"{bufsize_kbps}k"]
+    elif output_video_codec.endswith("_vaapi"):
+        # frames decoded on CPU are uploaded to the GPU, frames decoded by VAAPI (--hwaccel) are already there
+        args += ["-vf", "format=nv12|vaapi,hwupload"]
+        if target_kbps:
+            args += ["-rc_mode", "VBR", "-b:v", f"{target_kbps}k", "-maxrate", f"{target_kbps}k", "-bufsize", f"{bufsize_kbps}k"]
+        else:
+            args += ["-rc_mode", "CQP", "-qp", crf]
+    elif output_video_codec.endswith("_videotoolbox"):
+        if target_kbps:
+            args += ["-b:v", f"{target_kbps}k"]
+        else:
+            # quality 1-100 (higher is better), CRF 20 -> 60, CRF 28 -> 44
+            args += ["-q:v", str(max(1, min(100, 100 - 2 * int(crf))))]
+    elif output_video_codec == "libx265":
         args += ["-preset", "fast"]
         args += ["-crf", crf]
-        target_kbps = int(max_video_bitrate) if force_bitrate_limit and max_video_bitrate > 0 else None
-        bufsize_kbps = target_kbps * 2 if target_kbps else None
 
         x265_options = []
         # Add x265 options for bitrate control
@@ -414,152 +807,311 @@ def build_video_args(input_path, convert_video, output_video_codec, crf, force_b
         # x265_options = ["rd=1", "psy-rd=1.2", "bframes=2", "lookahead-slices=10", "no-sao=1", "no-strong-intra-smoothing=1"]
         if target_kbps:
             x265_options += [f"vbv-maxrate={target_kbps}", f"vbv-bufsize={bufsize_kbps}"]
+        if MULTITHREADING_ENABLED and PARALLEL_JOBS > 1:
+            # x265 runs its own thread pool that -threads doesn't limit, size it to this job's share of threads.
+            # A single job keeps x265's defaults, a pool over all cores and frame threads picked for them.
+            x265_options += [f"pools={NUMBER_OF_THREADS}", f"frame-threads={max(1, min(6, NUMBER_OF_THREADS // 3))}"]
         # Example of additional optimization:
         #x265_options += ["rd=1", "psy-rd=1.2", "no-sao=1", "no-strong-intra-smoothing=1"]
         if x265_options:
             x265_params = ":".join(x265_options)
             args += ["-x265-params", x265_params]
+    elif output_video_codec == "libsvtav1":
+        args += ["-preset", SVTAV1_PRESET]
+        args += ["-crf", crf]
+        if target_kbps:
+            args += ["-maxrate", f"{target_kbps}k", "-bufsize", f"{bufsize_kbps}k"]
+    else:
+        # Other software encoders (libx264,...) understand -crf and generic rate limits
+        args += ["-preset", "fast"]
+        args += ["-crf", crf]
+        if target_kbps:
+            args += ["-maxrate", f"{target_kbps}k", "-bufsize", f"{bufsize_kbps}k"]
 
-    else: 
-        if COPY_ALL_AUDIO_OR_VIDEO_STREAMS_OF_ALLOWED_CODECS:
-            args += ["-map", "0:v"]  # copy all video streams
-        else:
-            args += ["-map", "0:v:0"]  # copy only first video stream
-        args += ["-c:v", "copy"]
+    return tuple(args)
 
-    return args
+def build_video_args(codecs, convert_video, output_video_codec, crf, force_bitrate_limit, max_video_bitrate, output_ext):
+    if convert_video:
+        target_kbps = int(max_video_bitrate) if force_bitrate_limit and max_video_bitrate > 0 else None
+        # always convert only the first video stream
+        return ("-map", "0:v:0", *_video_encoder_args(output_video_codec, crf, target_kbps))
+
+    if COPY_ALL_AUDIO_OR_VIDEO_STREAMS_OF_ALLOWED_CODECS:
+        return ("-map", "0:v", "-c:v", "copy")  # copy all video streams
+    return ("-map", "0:v:0", "-c:v", "copy")  # copy only first video stream
 
 # ====================
-def build_audio_args(input_path, convert_audio, original_audio_codec, output_audio_codec, scan_func):
-    args = []
+def hw_device_args(output_video_codec):
+    """Global ffmpeg options (before -i) needed by some hardware encoders."""
+    if output_video_codec.endswith("_vaapi"):
+        return ["-vaapi_device", VAAPI_DEVICE]
+    return []
+
+def hw_decode_args(output_video_codec):
+    """Input options (before -i) that decode on the GPU of the given hardware encoder, empty for software encoders."""
+    # With the preview output frames are also needed by CPU filters and libx264, so they are copied back to RAM
+    keep_on_gpu = not EXTRA_OUTPUT_ENABLED
+    if output_video_codec.endswith("_nvenc"):
+        return ["-hwaccel", "cuda"] + (["-hwaccel_output_format", "cuda"] if keep_on_gpu else [])
+    if output_video_codec.endswith("_qsv"):
+        return ["-hwaccel", "qsv"] + (["-hwaccel_output_format", "qsv"] if keep_on_gpu else [])
+    if output_video_codec.endswith("_vaapi"):
+        return ["-hwaccel", "vaapi", "-hwaccel_device", VAAPI_DEVICE] + (["-hwaccel_output_format", "vaapi"] if keep_on_gpu else [])
+    if output_video_codec.endswith("_videotoolbox"):
+        return ["-hwaccel", "videotoolbox"]
+    return []
+
+def _encoder_works(encoder):
+    # Encode a few frames of a generated clip, fails quickly if there is no usable device for the encoder
+    cmd = ["ffmpeg", "-hide_banner", "-v", "error"] + hw_device_args(encoder)
+    cmd += ["-f", "lavfi", "-i", "color=black:s=256x256:d=0.2"]
+    cmd += build_video_args(None, True, encoder, "28", False, 0, None)[2:]  # without -map 0:v:0
+    cmd += ["-f", "null", "-"]
+    try:
+        return subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
 
-    if convert_audio:
-        args += ["-map", "0:a:0"]  # always convert only the first audio stream
-        args += ["-map_metadata", "-1"]
-        args += ["-c:a", OUTPUT_AUDIO_CODEC]
-
-        audio_info = scan_func(input_path).get("audio_metadata", {})
-        ch = audio_info.get("channels")
-        sr = audio_info.get("sample_rate", "?")
-        ch_desc = "Unknown"
-        ch_num = None
-
-        if isinstance(ch, int):
-            ch_num = ch
-        elif isinstance(ch, str):
-            match = re.match(r"(\d)(?:\.(\d))?", ch)
-            if match:
-                front = int(match.group(1))
-                lfe = int(match.group(2)) if match.group(2) else 0
-                ch_num = front + lfe
-
-        if ch_num is not None:
-            if ch_num > 8:
-                ch_desc = f"{ch_num}ch"
-            elif ch_num == 8:
-                ch_desc = "7.1"
-            elif ch_num == 6:
-                ch_desc = "5.1"
-            elif ch_num == 2:
-                ch_desc = "2.0"
-            elif ch_num == 1:
-                ch_desc = "Mono"
-            else:
-                ch_desc = f"{ch_num}ch"
-        else:
-            ch_desc = "5.1"
+def detect_hw_encoder():
+    """Returns the first hardware encoder from HW_VIDEO_ENCODERS that ffmpeg has and that actually works, or None."""
+    try:
+        output = subprocess.check_output(["ffmpeg", "-hide_banner", "-encoders"], stderr=subprocess.DEVNULL, encoding="utf-8", errors="replace")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    available = set()
+    for line in output.splitlines():
+        # " V....D libx265   libx265 H.265 / HEVC (codec hevc)" -> only the name is needed, not the description
+        _, _, rest = line.strip().partition(" ")
+        available.add(rest.lstrip().partition(" ")[0])
+    for encoder in HW_VIDEO_ENCODERS:
+        if encoder in available and _encoder_works(encoder):
+            return encoder
+    return None
 
-        if OUTPUT_AUDIO_CODEC.upper() in ["AC3", "EAC3"] and ch_desc == "7.1": #AC3 supports max 5.1
+# ====================
+@lru_cache(maxsize=None)
+def _audio_encoder_args(channels, sample_rate):
+    # Only a few channels/sample rate combinations exist in a library, each one is built once and reused as a tuple
+    args = ["-c:a", OUTPUT_AUDIO_CODEC]
+
+    sr = sample_rate or "?"
+    ch_desc = "Unknown"
+    ch_num = None
+
+    if isinstance(channels, int):
+        ch_num = channels
+    elif isinstance(channels, str) and channels[:1].isdecimal():
+        # "5.1", "7.1", "2": front channels + LFE
+        ch_num = int(channels[0])
+        if channels[1:2] == "." and channels[2:3].isdecimal():
+            ch_num += int(channels[2])
+
+    if ch_num is not None:
+        if ch_num > 8:
+            ch_desc = f"{ch_num}ch"
+        elif ch_num == 8:
+            ch_desc = "7.1"
+        elif ch_num == 6:
             ch_desc = "5.1"
-            ch_num = 6  # force to 5.1 for AC3
+        elif ch_num == 2:
+            ch_desc = "2.0"
+        elif ch_num == 1:
+            ch_desc = "Mono"
+        else:
+            ch_desc = f"{ch_num}ch"
+    else:
+        ch_desc = "5.1"
 
-        bitrate = BITRATE_AUDIO_MAP.get(ch_num, DEFAULT_AUDIO_BITRATE)  # fallback if channels unknown
-        args += ["-b:a", bitrate]
+    if OUTPUT_AUDIO_CODEC.upper() in ["AC3", "EAC3"] and ch_desc == "7.1": #AC3 supports max 5.1
+        ch_desc = "5.1"
+        ch_num = 6  # force to 5.1 for AC3
 
-        title = f"{OUTPUT_AUDIO_CODEC.upper()} Audio / {ch_desc} / {sr} Hz / {bitrate}"
-        args += ["-metadata:s:a:0", f"title='{title}'"]
+    bitrate = BITRATE_AUDIO_MAP.get(ch_num, DEFAULT_AUDIO_BITRATE)  # fallback if channels unknown
+    args += ["-b:a", bitrate]
 
-        if OUTPUT_AUDIO_CODEC.upper() in ["AC3", "EAC3"]:
-            args += ["-ac", "6", "-channel_layout", "5.1"] #AC3 supports max 5.1
-        elif ch_num and ch_num > 2:
-            args += ["-ac", str(ch_num)]
+    title = f"{OUTPUT_AUDIO_CODEC.upper()} Audio / {ch_desc} / {sr} Hz / {bitrate}"
+    args += ["-metadata:s:a:0", f"title={title}"]
 
-        args += ["-ar", "48000"]
+    if OUTPUT_AUDIO_CODEC.upper() in ["AC3", "EAC3"]:
+        args += ["-ac", "6", "-channel_layout", "5.1"] #AC3 supports max 5.1
+    elif ch_num and ch_num > 2:
+        args += ["-ac", str(ch_num)]
 
-        bps_value = bitrate.replace('k', '000')
-        args += ["-metadata:s:a:0", f"BPS={bps_value}"]
-    else:
-        if COPY_ALL_AUDIO_OR_VIDEO_STREAMS_OF_ALLOWED_CODECS:
-            args += ["-map", "0:a"]  # copy all audio streams
-        else:
-            args += ["-map", "0:a:0"]  # copy only first audio stream
-        args += ["-c:a", "copy"]
+    args += ["-ar", "48000"]
 
-    return args
+    bps_value = bitrate.replace('k', '000')
+    args += ["-metadata:s:a:0", f"BPS={bps_value}"]
+    return tuple(args)
 
-# ====================
-def convert_file(input_path, output_path, convert_video, \
-                 convert_audio, original_video_codec, original_audio_codec, crf, \
-                 force_bitrate_limit, max_video_bitrate,  dry_run=False, log_file=None, \
-                 force_mode_enabled=False):
-    #cmd = ["ffmpeg", "-y", "-analyzeduration", "5000000", "-probesize", "5000000", "-i", str(input_path)]
-    cmd = ["ffmpeg", "-y", "-i", str(input_path)]
+def build_audio_args(codecs, convert_audio, output_audio_codec):
+    if convert_audio:
+        # always convert only the first audio stream
+        # :g drops only global metadata, stream tags (language of audio and subtitles) are still copied by ffmpeg
+        return ("-map", "0:a:0", "-map_metadata:g", "-1", *_audio_encoder_args(codecs.channels, codecs.sample_rate))
 
+    if COPY_ALL_AUDIO_OR_VIDEO_STREAMS_OF_ALLOWED_CODECS:
+        return ("-map", "0:a", "-c:a", "copy")  # copy all audio streams
+    return ("-map", "0:a:0", "-c:a", "copy")  # copy only first audio stream
 
+# ====================
+FFMPEG_PIPE_BUFFER = 1 << 20  # ffmpeg output is read in up to 1 MiB blocks instead of many small reads
+
+def run_ffmpeg(cmd):
+    """Runs ffmpeg and relays its output to the console.
+
+    Raises CalledProcessError on failure, with the last line ffmpeg printed (usually the reason) as output.
+    """
+    console = sys.stdout.buffer
+    last_output = b""
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=FFMPEG_PIPE_BUFFER) as proc:
+        while True:
+            chunk = proc.stdout.read1(FFMPEG_PIPE_BUFFER)
+            if not chunk:
+                break
+            with LOG_LOCK:  # parallel jobs share the console
+                console.write(chunk)
+                console.flush()
+            last_output = (last_output + chunk)[-4096:]
+    if proc.returncode:
+        lines = last_output.decode("utf-8", errors="replace").replace("\r", "\n").split("\n")
+        last_line = next((line.strip() for line in reversed(lines) if line.strip()), "")
+        raise subprocess.CalledProcessError(proc.returncode, cmd, output=last_line)
+
+def build_output_args(input_path, output_path, codecs, convert_video, convert_audio, crf, force_bitrate_limit, max_video_bitrate):
+    """Stream mapping and codec options for one output file, they depend on its container (suffix)."""
     # Copy all subtitles if the input and output format is MKV
+    subtitle_args = []
     if input_path.suffix.lower() == ".mkv" and output_path.suffix.lower() == ".mkv":
-        cmd += ["-map", "0:s?", "-c:s", "copy"] # only mkv supports copying subtitles without conversion
+        # only mkv supports copying subtitles without conversion, their language tags come along with
+        # ffmpeg's automatic per-stream metadata copy (audio args drop only global metadata)
+        subtitle_args = ["-map", "0:s?", "-c:s", "copy"]
 
     # Compose video and audio arguments
-    cmd += build_video_args(input_path, convert_video, OUTPUT_VIDEO_CODEC, crf, force_bitrate_limit, max_video_bitrate, output_path.suffix.lower())
-    cmd += build_audio_args(input_path, convert_audio, original_audio_codec, OUTPUT_AUDIO_CODEC, scan_file)
+    video_args = build_video_args(codecs, convert_video, OUTPUT_VIDEO_CODEC, crf, force_bitrate_limit, max_video_bitrate, output_path.suffix.lower())
+    audio_args = build_audio_args(codecs, convert_audio, OUTPUT_AUDIO_CODEC)
+    return [*subtitle_args, *video_args, *audio_args]
 
-    if MULTITHREADING_ENABLED:
-        cmd += ["-threads", str(NUMBER_OF_THREADS)]
-    
-    cmd += [str(output_path)]
+OUTPUT_MUXERS = {".mkv": "matroska"}  # ffmpeg muxer names that differ from the file extension
 
+def convert_file(input_path, output_paths, codecs, convert_video, \
+                 convert_audio, crf, force_bitrate_limit, max_video_bitrate,  dry_run=False, log_file=None, \
+                 force_mode_enabled=False):
+    """Converts input_path to every file in output_paths with a single ffmpeg run, the input is decoded only once."""
+    global_args = []
+    if PARALLEL_JOBS > 1:
+        global_args += ["-nostdin"]  # parallel ffmpeg processes must not fight over the terminal input
+    if convert_video:
+        global_args += hw_device_args(OUTPUT_VIDEO_CODEC)
+        if HW_DECODE_ENABLED:
+            global_args += hw_decode_args(OUTPUT_VIDEO_CODEC)
+    thread_args = ["-threads", str(NUMBER_OF_THREADS)] if MULTITHREADING_ENABLED else []
+
+    # ffmpeg writes <output>.part files, renamed when it succeeds. An interrupted run leaves only .part files behind,
+    # which are not mistaken for finished conversions by the next run.
+    part_paths = {}  # final path -> .part path
+    def part_output(output_path):
+        part_path = part_paths[output_path] = output_path.with_name(output_path.name + ".part")
+        muxer = OUTPUT_MUXERS.get(output_path.suffix.lower(), output_path.suffix.lower().lstrip("."))
+        return ["-f", muxer, str(part_path)]  # muxer can't be guessed from the .part extension
+
+    # Every output gets its own options, ffmpeg -i in [out1 options] out1 [out2 options] out2
+    output_args = []
+    for output_path in output_paths:
+        output_args += build_output_args(input_path, output_path, codecs, convert_video, convert_audio, crf,
+                                         force_bitrate_limit, max_video_bitrate)
+        output_args += thread_args + part_output(output_path)
+
+    # Preview output reuses the same decoded input too
+    if EXTRA_OUTPUT_ENABLED:
+        extra_output_path = output_paths[0].with_name(output_paths[0].stem + EXTRA_OUTPUT_SUFFIX)
+        output_args += EXTRA_OUTPUT_ARGS + part_output(extra_output_path)
+
+    #cmd = ["ffmpeg", "-y", "-analyzeduration", "5000000", "-probesize", "5000000", "-i", str(input_path)]
+    cmd = ("ffmpeg", "-y", *global_args, "-i", str(input_path), *output_args)
+
+    # shlex.join quotes paths with spaces etc., so the logged command can be copied and run as it is
     if dry_run:
-        print_or_log("     DRY RUN: Would run: " + " ".join(cmd), log_file)
+        print_or_log("     DRY RUN: Would run: " + shlex.join(cmd), log_file)
         return
 
+    # Subtitles don't depend on the encoded file, they are copied/converted while ffmpeg is running
+    def copy_subtitles():
+        for output_path in output_paths:
+            copy_subtitle_if_exists(input_path, output_path, log_file)
+    subtitle_thread = threading.Thread(target=copy_subtitles)
+    subtitle_thread.start()
     try:
-        print_or_log("CMD used: " + " ".join(cmd), log_file)    
-        subprocess.run(cmd, check=True)
-        video_status = original_video_codec if convert_video else "OK"
-        audio_status = original_audio_codec if convert_audio else "OK"
-        print_or_log(f" --> File {output_path} has been converted (video was: {video_status}, audio was: {audio_status})", log_file)
-    except subprocess.CalledProcessError:
+        print_or_log("CMD used: " + shlex.join(cmd), log_file)
+        run_ffmpeg(cmd)
+        for output_path, part_path in part_paths.items():
+            os.replace(part_path, output_path)
+        video_status = codecs.video_codec if convert_video else "OK"
+        audio_status = codecs.audio_codec if convert_audio else "OK"
+        for output_path in output_paths:
+            print_or_log(f" --> File {output_path} has been converted (video was: {video_status}, audio was: {audio_status})", log_file)
+    except subprocess.CalledProcessError as e:
         print_or_log(f"     Error converting file {input_path}", log_file)
+        if e.output:
+            print_or_log(f"     ffmpeg: {e.output}", log_file)
+        subtitle_thread.join()
+        for output_path in output_paths:
+            # no conv-*.srt without its video, the next run would copy it again anyway
+            output_path.with_suffix(".srt").unlink(missing_ok=True)
+        for part_path in part_paths.values():
+            part_path.unlink(missing_ok=True)
         raise
-
-    copy_subtitle_if_exists(input_path, output_path, log_file, dry_run)
+    finally:
+        subtitle_thread.join()
 
 # ====================
-def process_file(file_path, crf, force_mp4, log_file=None, dry_run=False, force_mode_enabled=False):
-    if file_path.name.startswith("conv-"):
+def get_output_path(file_path, force_mp4):
+    """conv-<name> path next to file_path, .mkv stays .mkv unless MP4 output is forced, everything else becomes .mp4."""
+    output_ext = '.mp4' if force_mp4 else ('.mkv' if file_path.suffix.lower() == '.mkv' else '.mp4')
+    return file_path.with_name(f"conv-{file_path.stem}{output_ext}")
+
+CONVERTED_NAMES_LOCK = threading.Lock()  # parallel jobs share the conv-* name sets of iter_media_files
+
+def claim_output_name(converted_names, name):
+    """Adds name to converted_names, returns False if it's already there (output exists or another job writes it)."""
+    with CONVERTED_NAMES_LOCK:
+        if name in converted_names:
+            return False
+        converted_names.add(name)
+        return True
+
+def process_file(file_path, crf, force_mp4, log_file=None, dry_run=False, force_mode_enabled=False, stat_result=None, scan=None,
+                 converted_names=None):
+    """Converts file_path if needed, returns Codecs of the original file if it was converted, otherwise None."""
+    # converted_names: conv-* file names in file_path's directory (from iter_media_files), saves a stat() per file
+    name = file_path.name
+    suffix = file_path.suffix.lower()
+    if name.startswith("conv-"):
         print_or_log(f"     File {file_path} has already been converted (starts with 'conv-')", log_file)
-        return False
+        return None
 
-    if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
-        return False
+    if suffix not in SUPPORTED_EXTENSIONS:
+        return None
 
-    output_ext = '.mkv' if file_path.suffix.lower() == '.mkv' else '.mp4'
-    output_ext = '.mp4' if force_mp4 else ('.mkv' if file_path.suffix.lower() == '.mkv' else '.mp4')
-    output_filename = f"conv-{file_path.stem}{output_ext}"
-    output_path = file_path.parent / output_filename
-    if output_path.exists():
+    output_path = get_output_path(file_path, force_mp4)
+    output_ext = output_path.suffix
+    if converted_names is not None:
+        already_converted = output_path.name in converted_names
+    else:
+        already_converted = output_path.exists()
+    if already_converted:
         print_or_log(f"     File {file_path} has already been converted (output {output_path.name} exists)", log_file)
-        return False
+        return None
  
-    codecs = scan_file(file_path, log_file)
-    video_codec = codecs.get("video_codec")
-    audio_codec = codecs.get("audio_codec")
-    bitrate_kbps = codecs.get("bitrate_kbps", 0)
+    if scan is None:  # not scanned in advance by the caller
+        scan = scan_file(file_path, log_file, stat_result)
+    codecs = Codecs.from_scan(scan)
+    video_codec = codecs.video_codec
+    audio_codec = codecs.audio_codec
+    bitrate_kbps = codecs.bitrate_kbps
 
     if not video_codec or not audio_codec:
         print_or_log(f"     Skipping {file_path} (could not detect codecs)", log_file)
-        return False
+        return None
 
     if dry_run:
         print_or_log(f"\nDRY-RUN: Checking {file_path.name}", log_file)
@@ -577,7 +1129,7 @@ def process_file(file_path, crf, force_mp4, log_file=None, dry_run=False, force_
                     reasons.append("forced mode (video)")
                 if convert_video_force_bitrate_limit:
                     reasons.append(f"bitrate ({bitrate_kbps:.2f} kbps > {max_video_bitrate} kbps)")
-                if video_codec.upper() in FORCE_CONVERSION_VIDEO_CODECS or any(video_codec.upper().startswith(c) for c in FORCE_CONVERSION_VIDEO_CODECS):
+                if is_forced_video_codec(video_codec):
                     reasons.append(f"video codec ({video_codec})")
             if convert_audio:
                 if force_mode_enabled:
@@ -588,46 +1140,141 @@ def process_file(file_path, crf, force_mp4, log_file=None, dry_run=False, force_
             print_or_log(f"---> It would convert this file due to: {reason_str}", log_file)
 
     if not convert_video and not convert_audio:
-        print_or_log(f"     File {file_path} already in correct format.", log_file)
-        return False
-
-    convert_file(file_path, output_path, convert_video, convert_audio, video_codec, audio_codec, crf, \
+        if not (force_mp4 and suffix != output_ext and can_remux_to_mp4(video_codec, audio_codec)):
+            print_or_log(f"     File {file_path} already in correct format.", log_file)
+            return None
+        # Only the container changes, convert_file copies both streams (remux, no re-encoding)
+        if dry_run:
+            print_or_log(f"---> It would remux this file to {output_ext} (codecs can be copied)", log_file)
+
+    # Checked again together with the claim, another input with the same stem (movie.avi, movie.mp4) may have been
+    # converted by a parallel job since the check above, its output must not be overwritten
+    if converted_names is not None and not claim_output_name(converted_names, output_path.name):
+        print_or_log(f"     File {file_path} has already been converted (output {output_path.name} exists)", log_file)
+        return None
+    convert_file(file_path, [output_path], codecs, convert_video, convert_audio, crf, \
                  convert_video_force_bitrate_limit, max_video_bitrate, dry_run, log_file, force_mode_enabled)
-    return True
+    return codecs
 
 # ====================
-def process_subtitles_only(input_path, log_file=None, dry_run=False):
-    total_files = 0
-    converted_subs = 0
-    files = [input_path] if input_path.is_file() else list(input_path.rglob("*"))
-    for file in files:
-        if file.suffix.lower() not in SUPPORTED_EXTENSIONS or file.name.startswith("conv-"):
-            continue
+def _is_media(name):
+    """True for a supported video file name that isn't our own conv-* output."""
+    return not name.startswith("conv-") and name.lower().endswith(_MEDIA_SUFFIXES)
+
+def iter_media_files(root, converted_names=None, file_names=None):
+    """Recursively yields (path, stat_result) for supported video files under root, skipping conv-* files.
+
+    Uses os.scandir instead of Path.rglob. stat_result comes from DirEntry.stat(), which still makes a syscall on
+    Linux but caches it, so callers don't need to stat() the file again. It's None if the file can't be stat()ed
+    (e.g. a dangling symlink), such a file is still yielded like rglob does and the rest of the walk goes on.
+    If converted_names dict is given, it's filled with {directory: set of conv-* file names} seen during the walk,
+    complete for a directory once the walk has left it.
+    If file_names dict is given, it's filled the same way with names of all files, e.g. to look for subtitles.
+    """
+    dirs = [os.fspath(root)]  # plain path strings, Path objects are made only for dict keys and yielded files
+    while dirs:
+        current = dirs.pop()
+        try:
+            with os.scandir(current) as entries:
+                conv_names = set()
+                all_names = set()
+                if converted_names is not None:
+                    converted_names[Path(current)] = conv_names  # same key as file.parent of the yielded files
+                if file_names is not None:
+                    file_names[Path(current)] = all_names
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                        continue
+                    # Filter on the plain name, Path objects are only created for media files (not .nfo, .jpg, ...)
+                    name = entry.name
+                    all_names.add(name)
+                    if _is_media(name):
+                        try:
+                            stat_result = entry.stat()
+                        except OSError:
+                            stat_result = None
+                        yield Path(entry.path), stat_result
+                    elif name.startswith("conv-"):
+                        conv_names.add(name)
+        except OSError:
+            continue  # unreadable directory or directory vanished meanwhile, skip it like rglob does
+
+# ====================
+def format_codec_info(file_path, codecs):
+    # One multi-line message per file, written with a single print_or_log call
+    return (f"{file_path}\n"
+            f"  video codec: {codecs.get('video_codec')}\n"
+            f"  audio codec: {codecs.get('audio_codec')}\n"
+            f"  bitrate (kbps): {codecs.get('bitrate_kbps', 0)}")
 
-        base_srt = file.with_suffix(".srt")
-        utf8_srt = file.with_name(file.stem + ".utf8.srt")
+# ====================
+def _convert_one_sub(file, has_srt, has_utf8_srt, dry_run=False):
+    """Converts the .srt next to one media file to UTF-8 if needed, runs in a worker thread.
 
-        if utf8_srt.exists():
-            print_or_log(f"     Subtitle already exists: {utf8_srt.name}", log_file)
-            continue
+    has_srt, has_utf8_srt: whether <stem>.srt and <stem>.utf8.srt exist.
+    Returns (checked, converted, message), message may be None.
+    """
+    base_srt = file.with_suffix(".srt")
+    utf8_srt = file.with_name(file.stem + ".utf8.srt")
 
-        if base_srt.exists():
-            try:
-                result = subprocess.run(["file", "-b", "--mime-encoding", str(base_srt)], capture_output=True, text=True)
-                encoding = result.stdout.strip()
-                if encoding in ["unknown-8bit", "windows-1250"]:
-                    if not dry_run:
-                        subprocess.run(["iconv", "-f", "windows-1250", "-t", "UTF-8", "-o", str(utf8_srt), str(base_srt)], check=True)
-                        print_or_log(f"     Subtitle converted and saved: {utf8_srt.name}", log_file)
-                    else:
-                        print_or_log(f"     DRY RUN: Would convert {base_srt.name} and save as {utf8_srt.name}", log_file)
-                    converted_subs += 1
-                else:
-                    print_or_log(f"     Subtitle {base_srt.name} encoding '{encoding}' does not require conversion.", log_file)
-            except Exception as e:
-                print_or_log(f"     Error checking/converting subtitle: {e}", log_file)
+    if has_utf8_srt:
+        return False, False, f"     Subtitle already exists: {utf8_srt.name}"
+    if not has_srt:
+        return True, False, None
 
-        total_files += 1
+    try:
+        encoding = detect_encoding(base_srt)
+        if encoding in ["unknown-8bit", "windows-1250"]:
+            if not dry_run:
+                _cp1250_to_utf8(base_srt, utf8_srt)
+                return True, True, f"     Subtitle converted and saved: {utf8_srt.name}"
+            return True, True, f"     DRY RUN: Would convert {base_srt.name} and save as {utf8_srt.name}"
+        return True, False, f"     Subtitle {base_srt.name} encoding '{encoding}' does not require conversion."
+    except Exception as e:
+        return True, False, f"     Error checking/converting subtitle: {e}"
+
+def process_subtitles_only(input_path, log_file=None, dry_run=False):
+    total_files = 0
+    converted_subs = 0
+    file_names = {}  # directory -> names of files in it, subtitles are looked up here instead of stat() on each
+    files = [input_path] if input_path.is_file() else [file for file, _ in iter_media_files(input_path, file_names=file_names)]
+
+    # Subtitles don't depend on each other, SCAN_THREADS of them are detected and converted at the same time,
+    # messages are printed in walk order
+    with ThreadPoolExecutor(max_workers=SCAN_THREADS) as pool:
+        jobs = []  # (file, job, has_utf8_srt), job is None if an earlier file may write the same .utf8.srt
+        claimed = set()  # .utf8.srt paths of files whose subtitle is being checked by a job
+        for file in files:
+            if not _is_media(file.name):  # single file argument
+                continue
+            names = file_names.get(file.parent)
+            if names is None:  # single file argument, directory wasn't walked
+                names = file_names[file.parent] = set(os.listdir(file.parent))
+            utf8_srt = file.with_name(file.stem + ".utf8.srt")
+            has_srt = file.stem + ".srt" in names
+            has_utf8_srt = utf8_srt.name in names
+            if has_srt and utf8_srt in claimed:
+                jobs.append((file, None, has_utf8_srt))
+                continue
+            if has_srt:
+                claimed.add(utf8_srt)
+            jobs.append((file, pool.submit(_convert_one_sub, file, has_srt, has_utf8_srt, dry_run), has_utf8_srt))
+
+        written = set()  # .utf8.srt paths created by this run
+        for file, job, has_utf8_srt in jobs:
+            utf8_srt = file.with_name(file.stem + ".utf8.srt")
+            if job is None:
+                # Same stem as an earlier file (movie.avi, movie.mkv), decided after that one like in a serial run
+                checked, converted, message = _convert_one_sub(file, True, has_utf8_srt or utf8_srt in written, dry_run)
+            else:
+                checked, converted, message = job.result()
+            if converted and not dry_run:
+                written.add(utf8_srt)
+            if message:
+                print_or_log(message, log_file)
+            total_files += checked
+            converted_subs += converted
 
     print_or_log("\nSubtitles Summary:", log_file)
     print_or_log(f"  Files checked: {total_files}", log_file)
@@ -645,93 +1292,143 @@ if __name__ == "__main__":
     max_video_bitrate = args.max_video_bitrate if args.max_video_bitrate is not None else 0
     CRF = str(args.crf if args.crf is not None else DEFAULT_CRF)
     
+    if args.jobs is not None and args.jobs > 1:
+        PARALLEL_JOBS = args.jobs
+    if PARALLEL_JOBS > 1: # split available threads between parallel jobs
+        NUMBER_OF_THREADS = min(NUMBER_OF_THREADS, max(1, multiprocessing.cpu_count() // PARALLEL_JOBS))
+
+    if args.no_cache:
+        PROBE_CACHE_ENABLED = False
+    if PROBE_CACHE_ENABLED:
+        atexit.register(close_probe_cache)
+
     if force_mp4: #MP4 supports only one video and one audio stream, so we need to set COPY_ALL_AUDIO_OR_VIDEO_STREAMS_OF_ALLOWED_CODECS to False
         COPY_ALL_AUDIO_OR_VIDEO_STREAMS_OF_ALLOWED_CODECS = False
 
-    #Convert codec lists to uppercase
-    FORCE_CONVERSION_VIDEO_CODECS = [v.upper() for v in FORCE_CONVERSION_VIDEO_CODECS]
-    FORCE_CONVERSION_AUDIO_CODECS = [a.upper() for a in FORCE_CONVERSION_AUDIO_CODECS]
-
     if args.info_only:
         if input_path.is_file():
             codecs = scan_file(input_path, log_file)
-            print_or_log(f"{input_path}", log_file)
-            print_or_log(f"  video codec: {codecs.get('video_codec')}", log_file)
-            print_or_log(f"  audio codec: {codecs.get('audio_codec')}", log_file)
-            print_or_log(f"  bitrate (kbps): {codecs.get('bitrate_kbps', 0)}", log_file)
+            print_or_log(format_codec_info(input_path, codecs), log_file)
             sys.exit(0)
 
         elif input_path.is_dir():
-            for file in input_path.rglob("*"):
-                if not file.name.startswith("conv-") and file.suffix.lower() in SUPPORTED_EXTENSIONS:
-                    codecs = scan_file(file, log_file)
-                    print_or_log(f"{file}", log_file)
-                    print_or_log(f"  video codec: {codecs.get('video_codec')}", log_file)
-                    print_or_log(f"  audio codec: {codecs.get('audio_codec')}", log_file)
-                    print_or_log(f"  bitrate (kbps): {codecs.get('bitrate_kbps', 0)}", log_file)
+            media_files = list(iter_media_files(input_path))
+            # SCAN_THREADS ffprobes run at the same time, results are printed in walk order
+            with ThreadPoolExecutor(max_workers=SCAN_THREADS) as scanner:
+                scans = [scanner.submit(scan_file, file, log_file, stat_result) for file, stat_result in media_files]
+                for (file, _), scan in zip(media_files, scans):
+                    codecs = scan.result()
+                    print_or_log(format_codec_info(file, codecs), log_file)
             sys.exit(0)
 
     if args.subs_only:
         process_subtitles_only(input_path, log_file, dry_run)
         sys.exit(0)
 
+    if args.encoder == "auto":
+        hw_encoder = detect_hw_encoder()
+        if hw_encoder:
+            OUTPUT_VIDEO_CODEC = hw_encoder
+            print_or_log(f" ===> Using hardware video encoder: {OUTPUT_VIDEO_CODEC}", log_file)
+        else:
+            print_or_log(f" ===> No working hardware video encoder found, using {OUTPUT_VIDEO_CODEC}", log_file)
+    elif args.encoder:
+        OUTPUT_VIDEO_CODEC = ENCODER_ALIASES.get(args.encoder, args.encoder)
+
+    if args.extra_output:
+        EXTRA_OUTPUT_ENABLED = True
+
+    if args.hwaccel:
+        HW_DECODE_ENABLED = True
+        if not hw_decode_args(OUTPUT_VIDEO_CODEC):
+            print_or_log(f" ===> --hwaccel has no effect with software encoder {OUTPUT_VIDEO_CODEC}", log_file)
+
     total_files = 0
     converted = 0
     skipped = 0
     failed = 0
-    converted_files = []  # list of tuples: (path, video_status, audio_status)
-    failed_files = []
+    # Summary lines of converted/failed files are written to temporary files as they come instead of being kept
+    # in memory for the whole run, they are read back for the summary at the end
+    converted_files = tempfile.TemporaryFile("w+", encoding="utf-8")
+    failed_files = tempfile.TemporaryFile("w+", encoding="utf-8")
     
     if force_mode_enabled:
         print_or_log(" ===> FORCE mode enabled: all audio and video streams will be re-encoded.", log_file)
 
+    converted_names = {}  # directory -> names of conv-* files in it, filled by the directory walk
     if input_path.is_file():
-        total_files += 1
-        try:
-            if process_file(input_path, CRF, force_mp4, log_file, dry_run, force_mode_enabled):
-                converted += 1
-                codecs = scan_file(input_path, log_file)
-                video_status, audio_status, bitrate_status = codecs.get('video_codec', 'N/A'), codecs.get('audio_codec', 'N/A'), codecs.get('bitrate_kbps', 'N/A')
-                converted_files.append((str(input_path), video_status, audio_status, bitrate_status))
-            else:
-                skipped += 1
-        except Exception:
-            print_or_log(f" !!! Error processing file {input_path}: {sys.exc_info()[1]}", log_file)
-            failed += 1
-            failed_files.append(str(input_path))
+        media_files = [(input_path, None)]
     elif input_path.is_dir():
-        for file in input_path.rglob("*"):
-            if not file.name.startswith("conv-") and file.suffix.lower() in SUPPORTED_EXTENSIONS:
+        media_files = list(iter_media_files(input_path, converted_names))
+    else:
+        media_files = []
+
+    def process_file_in_job(media_file, scan):
+        file, stat_result = media_file
+        try:
+            return process_file(file, CRF, force_mp4, log_file, dry_run, force_mode_enabled, stat_result, scan.result() if scan else None,
+                                converted_names.get(file.parent)), None
+        # Failures expected for a single file (ffmpeg error, unreadable file, bad probe output) are counted and the
+        # run goes on, anything else is a bug and stops the run with a traceback
+        except (subprocess.CalledProcessError, OSError, ValueError) as e:
+            return None, e
+
+    def scan_ahead(file):
+        # Files whose output already exists are skipped by process_file before scanning, don't probe them ahead either.
+        # A single file argument isn't walked, its job scans it.
+        names = converted_names.get(file.parent)
+        return names is not None and get_output_path(file, force_mp4).name not in names
+
+    # Two phases: files are scanned by SCAN_THREADS ffprobes at the same time, ahead of conversion, and
+    # each conversion job only waits for the scan of its own file, never for scans of the whole directory.
+    with ThreadPoolExecutor(max_workers=SCAN_THREADS) as scanner, ThreadPoolExecutor(max_workers=PARALLEL_JOBS) as executor:
+        scans = [scanner.submit(scan_file, file, log_file, stat_result) if scan_ahead(file) else None
+                 for file, stat_result in media_files]
+        jobs = {executor.submit(process_file_in_job, media_file, scan): media_file for media_file, scan in zip(media_files, scans)}
+        # Results are counted in the main thread as soon as each job finishes, a long conversion doesn't hold back the others
+        try:
+            for job in as_completed(jobs):
+                file, stat_result = jobs[job]
+                codecs, error = job.result()
                 total_files += 1
-                try:
-                    if process_file(file, CRF, force_mp4, log_file, dry_run, force_mode_enabled):
-                        converted += 1
-                        codecs = scan_file(file, log_file)
-                        video_status, audio_status, bitrate_status = codecs.get('video_codec', 'N/A'), codecs.get('audio_codec', 'N/A'), codecs.get('bitrate_kbps', 'N/A')
-                        converted_files.append((str(file), video_status, audio_status, bitrate_status))
-                    else:
-                        skipped += 1
-                except Exception:
-                    print_or_log(f" !!! Error processing file {file}: {sys.exc_info()[1]}", log_file)
-                    failed_files.append(str(file))
+                if error is not None:
+                    print_or_log(f" !!! Error processing file {file}: {error}", log_file)
+                    failed_files.write(f" {file}\n")
                     failed += 1
-
-    if converted_files:
-        print_or_log("\nConverted files:", log_file)
-        for fpath, vcodec, acodec, bitrate in converted_files:
-            print_or_log(f" {fpath} (Video was: {vcodec}, audio was: {acodec}, bitrate was: {bitrate} kbps)", log_file)
-          
-    if failed_files:
-        print_or_log("\nFailed files:", log_file)
-        for f in failed_files:
-            print_or_log(f" {f}", log_file)
+                elif codecs is not None:
+                    converted += 1
+                    converted_files.write(f" {file} (Video was: {codecs.video_codec}, audio was: {codecs.audio_codec}, "
+                                          f"bitrate was: {codecs.bitrate_kbps} kbps)\n")
+                else:
+                    skipped += 1
+        except BaseException:
+            # Ctrl+C (or an unexpected error) must not wait for every queued file to be converted first. Jobs and
+            # scans that haven't started are cancelled, leaving the executors only the running ones to wait for.
+            for future in [*jobs, *scans]:
+                if future is not None:
+                    future.cancel()
+            raise
+
+    # Each list is printed/logged with one call instead of one per file
+    if converted:
+        converted_files.seek(0)
+        print_or_log("\nConverted files:\n" + converted_files.read().rstrip("\n"), log_file)
+    converted_files.close()
+
+    if failed:
+        failed_files.seek(0)
+        print_or_log("\nFailed files:\n" + failed_files.read().rstrip("\n"), log_file)
+    failed_files.close()
 
     print_or_log("\nSummary:", log_file)
     print_or_log(f"  Total files checked: {total_files}", log_file)
     print_or_log(f"  Converted: {converted}", log_file)
     print_or_log(f"  Skipped: {skipped}", log_file)
     print_or_log(f"  Failed: {failed}", log_file)
-    print_or_log(f"  Using {NUMBER_OF_THREADS} threads for conversion.", log_file)
+    if PARALLEL_JOBS > 1:
+        print_or_log(f"  Using {PARALLEL_JOBS} parallel jobs with {NUMBER_OF_THREADS} threads each for conversion.", log_file)
+    else:
+        print_or_log(f"  Using {NUMBER_OF_THREADS} threads for conversion.", log_file)
     # show time elapsed for the whole script
     end_time = time.time()
     elapsed_seconds = end_time - start_time